@@ -1,13 +1,19 @@
 """Streamlit dashboard for grain price visualization."""
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import database
 
+# pandas, numpy and plotly are imported lazily inside the functions that
+# need them: plotly alone adds seconds to Streamlit's cold start, and the
+# empty-database branch needs none of them
+
+
+# Charts never need more points than this per commodity; the browser
+# renders every sample it receives, so cap the payload
+MAX_CHART_POINTS = 2000
+
 
 st.set_page_config(
     page_title="Grain Prices - Rolla",
@@ -19,31 +25,153 @@ st.title("Grain Price Dashboard - Rolla Location")
 st.markdown("*Data from Legacy Cooperative*")
 
 
-def load_data():
-    """Load all price data from database."""
-    data = database.get_price_history()
-    if not data:
-        return pd.DataFrame()
+def downsample_lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of the points to keep. Picks the point in each
+    bucket forming the largest triangle with its neighbours, which
+    preserves peaks and troughs far better than naive striding.
+    """
+    import numpy as np
+
+    n = len(x)
+    if n <= n_out:
+        return np.arange(n)
+
+    # First and last points are always kept; the rest bucket evenly
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+
+    y = np.nan_to_num(y)
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[hi:next_hi].mean()
+        avg_y = y[hi:next_hi].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + area.argmax()
+        keep[i + 1] = a
+
+    return keep
+
+
+def downsample_for_chart(df, value_col):
+    """Cap each commodity's trace at MAX_CHART_POINTS for plotting."""
+    import numpy as np
+    import pandas as pd
+
+    if len(df) <= MAX_CHART_POINTS:
+        return df
+
+    pieces = []
+    for _, group in df.groupby('commodity', observed=True):
+        group = group.sort_values('timestamp')
+        if len(group) > MAX_CHART_POINTS:
+            idx = downsample_lttb(
+                group['timestamp'].to_numpy(np.int64),
+                group[value_col].to_numpy(np.float64),
+                MAX_CHART_POINTS
+            )
+            group = group.iloc[idx]
+        pieces.append(group)
+
+    return pd.concat(pieces)
+
+
+def build_line_chart(df, value_col, title, y_label):
+    """Build a line chart with one WebGL trace per commodity.
+
+    Scattergl renders through WebGL instead of one SVG node per point,
+    which stays fluid well past the point counts where SVG chokes.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for commodity, group in downsample_for_chart(df, value_col).groupby('commodity', observed=True):
+        group = group.sort_values('timestamp')
+        fig.add_trace(go.Scattergl(
+            x=group['timestamp'],
+            y=group[value_col],
+            name=commodity,
+            mode='lines'
+        ))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title='Date',
+        yaxis_title=y_label,
+        legend_title_text='Commodity'
+    )
+    return fig
+
+
+@st.cache_data(ttl=60)
+def load_data(commodities, start_date, end_date):
+    """Load the selected window of price data from the database."""
+    return database.get_price_history_df(
+        commodities=list(commodities),
+        start_date=datetime.combine(start_date, datetime.min.time()),
+        end_date=datetime.combine(end_date, datetime.max.time())
+    )
+
+
+@st.cache_data(ttl=60)
+def get_summary(commodities, start_date, end_date):
+    """Cached per-commodity statistics, aggregated in SQLite."""
+    return database.get_summary(
+        commodities=list(commodities),
+        start_date=datetime.combine(start_date, datetime.min.time()),
+        end_date=datetime.combine(end_date, datetime.max.time())
+    )
+
+
+@st.cache_data(ttl=300)
+def get_commodities():
+    """Cached commodity list for the sidebar."""
+    return database.get_commodities()
+
+
+@st.cache_data(ttl=60)
+def get_date_range():
+    """Cached overall data range."""
+    return database.get_date_range()
+
 
-    df = pd.DataFrame(data)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    return df
+@st.cache_data(ttl=60)
+def to_csv_bytes(commodities, start_date, end_date):
+    """CSV export for the selected window, serialized once per filter set.
+
+    Keyed on the filter tuple so reruns skip both re-serializing and
+    hashing the whole frame; the data itself comes from the cached
+    load_data call.
+    """
+    df = load_data(commodities, start_date, end_date)
+    return df.to_csv(index=False).encode('utf-8')
 
 
 def main():
-    # Load data
-    df = load_data()
+    # Overall data range, straight from the database
+    db_range = get_date_range()
 
-    if df.empty:
+    if db_range is None:
         st.warning("No data available yet. Run the scraper first:")
         st.code("python scraper.py")
         return
 
+    min_date = db_range[0].date()
+    max_date = db_range[1].date()
+
     # Sidebar filters
     st.sidebar.header("Filters")
 
     # Commodity filter
-    commodities = database.get_commodities()
+    commodities = get_commodities()
     selected_commodities = st.sidebar.multiselect(
         "Select Commodities",
         options=commodities,
@@ -51,9 +179,6 @@ def main():
     )
 
     # Date range filter
-    min_date = df['timestamp'].min().date()
-    max_date = df['timestamp'].max().date()
-
     date_range = st.sidebar.date_input(
         "Date Range",
         value=(min_date, max_date),
@@ -61,29 +186,25 @@ def main():
         max_value=max_date
     )
 
-    # Filter data
     if len(date_range) == 2:
         start_date, end_date = date_range
-        mask = (
-            (df['commodity'].isin(selected_commodities)) &
-            (df['timestamp'].dt.date >= start_date) &
-            (df['timestamp'].dt.date <= end_date)
-        )
-        filtered_df = df[mask]
     else:
-        filtered_df = df[df['commodity'].isin(selected_commodities)]
+        start_date, end_date = min_date, max_date
+
+    # Filtering happens in SQL; only the visible window is transferred
+    filtered_df = load_data(tuple(selected_commodities), start_date, end_date)
 
     # Current prices section
     st.header("Current Prices")
 
     latest_prices = database.get_latest_prices()
     if latest_prices:
-        latest_df = pd.DataFrame(latest_prices)
+        selected_set = set(selected_commodities)
 
         # Display as metric cards
         cols = st.columns(min(len(latest_prices), 4))
         for i, price in enumerate(latest_prices):
-            if price['commodity'] in selected_commodities:
+            if price['commodity'] in selected_set:
                 with cols[i % 4]:
                     cash_str = f"${price['cash_price']:.2f}" if price['cash_price'] else "N/A"
                     basis_str = f"Basis: {price['basis']}" if price['basis'] else ""
@@ -93,26 +214,19 @@ def main():
                         delta=basis_str if basis_str else None
                     )
 
-        # Last updated
-        if latest_prices:
-            last_update = latest_prices[0].get('timestamp', 'Unknown')
-            st.caption(f"Last updated: {last_update}")
+        # Last updated: newest row across commodities, since each card
+        # shows its commodity's own latest scrape and those can differ
+        last_update = datetime.fromtimestamp(
+            max(p['timestamp'] for p in latest_prices)
+        )
+        st.caption(f"Last updated: {last_update:%Y-%m-%d %H:%M}")
 
     # Price history chart
     st.header("Price History")
 
     if not filtered_df.empty:
-        fig = px.line(
-            filtered_df,
-            x='timestamp',
-            y='cash_price',
-            color='commodity',
-            title='Cash Prices Over Time',
-            labels={
-                'timestamp': 'Date',
-                'cash_price': 'Cash Price ($)',
-                'commodity': 'Commodity'
-            }
+        fig = build_line_chart(
+            filtered_df, 'cash_price', 'Cash Prices Over Time', 'Cash Price ($)'
         )
         fig.update_layout(
             hovermode='x unified',
@@ -122,46 +236,38 @@ def main():
 
         # Basis chart
         if 'basis' in filtered_df.columns and filtered_df['basis'].notna().any():
-            fig_basis = px.line(
-                filtered_df,
-                x='timestamp',
-                y='basis',
-                color='commodity',
-                title='Basis Over Time',
-                labels={
-                    'timestamp': 'Date',
-                    'basis': 'Basis',
-                    'commodity': 'Commodity'
-                }
+            fig_basis = build_line_chart(
+                filtered_df, 'basis', 'Basis Over Time', 'Basis'
             )
             st.plotly_chart(fig_basis, use_container_width=True)
     else:
         st.info("No data available for selected filters.")
 
-    # Data table
+    # Data table, collapsed by default so the raw rows only render on demand
     st.header("Price Data")
 
     if not filtered_df.empty:
-        display_df = filtered_df[[
-            'timestamp', 'commodity', 'cash_price', 'basis',
-            'futures_change', 'delivery_start', 'delivery_end'
-        ]].copy()
-        display_df['timestamp'] = display_df['timestamp'].dt.strftime('%Y-%m-%d %H:%M')
-
-        st.dataframe(
-            display_df,
-            use_container_width=True,
-            hide_index=True
-        )
+        with st.expander("Show raw records"):
+            display_df = filtered_df[[
+                'timestamp', 'commodity', 'cash_price', 'basis',
+                'futures_change', 'delivery_start', 'delivery_end'
+            ]].copy()
+            display_df['timestamp'] = display_df['timestamp'].dt.strftime('%Y-%m-%d %H:%M')
+
+            st.dataframe(
+                display_df,
+                use_container_width=True,
+                hide_index=True
+            )
 
-        # Export button
-        csv = filtered_df.to_csv(index=False)
-        st.download_button(
-            label="Download CSV",
-            data=csv,
-            file_name=f"grain_prices_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv"
-        )
+            # Export button
+            csv = to_csv_bytes(tuple(selected_commodities), start_date, end_date)
+            st.download_button(
+                label="Download CSV",
+                data=csv,
+                file_name=f"grain_prices_{datetime.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv"
+            )
 
     # Stats section
     st.header("Statistics")
@@ -170,15 +276,19 @@ def main():
         col1, col2 = st.columns(2)
 
         with col1:
+            import pandas as pd
+
             st.subheader("Price Summary")
-            summary = filtered_df.groupby('commodity')['cash_price'].agg(['min', 'max', 'mean', 'count'])
-            summary.columns = ['Min', 'Max', 'Average', 'Records']
-            summary = summary.round(2)
+            summary = pd.DataFrame(
+                get_summary(tuple(selected_commodities), start_date, end_date)
+            )
+            summary.columns = ['Commodity', 'Min', 'Max', 'Average', 'Records']
+            summary = summary.set_index('Commodity').round(2)
             st.dataframe(summary, use_container_width=True)
 
         with col2:
             st.subheader("Data Collection")
-            st.metric("Total Records", len(df))
+            st.metric("Total Records", database.get_record_count())
             st.metric("Date Range", f"{min_date} to {max_date}")
             st.metric("Commodities Tracked", len(commodities))
 
@@ -1,48 +1,109 @@
 """Database operations for grain price storage."""
 
 import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 DB_PATH = Path(__file__).parent / "grain_prices.db"
 
+_local = threading.local()
+
+# WAL mode persists in the database file, so it only needs to be set once
+_wal_enabled = False
+
+
+def _apply_pragmas(conn: sqlite3.Connection) -> None:
+    """Apply performance pragmas to a connection."""
+    global _wal_enabled
+
+    if not _wal_enabled:
+        conn.execute("PRAGMA journal_mode=WAL")
+        _wal_enabled = True
+
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+
 
 def get_connection() -> sqlite3.Connection:
-    """Get a database connection with row factory."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    """Get the cached per-thread database connection."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        _apply_pragmas(conn)
+        _local.conn = conn
     return conn
 
 
+# Clustered by (commodity, timestamp) so a commodity's history sits on
+# contiguous pages; delivery_start completes the key since one scrape can
+# carry several delivery periods per commodity
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS grain_prices (
+        commodity TEXT NOT NULL,
+        timestamp INTEGER NOT NULL,
+        cash_price REAL,
+        basis REAL,
+        futures_change REAL,
+        delivery_start TEXT NOT NULL DEFAULT '',
+        delivery_end TEXT,
+        PRIMARY KEY (commodity, timestamp, delivery_start)
+    ) WITHOUT ROWID
+"""
+
+
+def _migrate_to_clustered(conn: sqlite3.Connection) -> None:
+    """One-time migration from the old rowid table to the clustered one."""
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type='table' AND name='grain_prices'"
+    ).fetchone()
+
+    if row is None or 'WITHOUT ROWID' in row['sql']:
+        return
+
+    with conn:
+        conn.execute("ALTER TABLE grain_prices RENAME TO grain_prices_old")
+        conn.execute(_SCHEMA)
+        # Databases from before the epoch-timestamp change hold ISO-8601
+        # text written from naive local datetimes; the 'utc' modifier
+        # interprets them as local time so the epoch reads back the same
+        conn.execute("""
+            INSERT OR REPLACE INTO grain_prices
+            (commodity, timestamp, cash_price, basis, futures_change, delivery_start, delivery_end)
+            SELECT commodity,
+                   CASE WHEN typeof(timestamp) = 'text'
+                        THEN CAST(strftime('%s', timestamp, 'utc') AS INTEGER)
+                        ELSE timestamp END,
+                   cash_price, basis, futures_change,
+                   COALESCE(delivery_start, ''), delivery_end
+            FROM grain_prices_old
+        """)
+        conn.execute("DROP TABLE grain_prices_old")
+
+
 def init_db() -> None:
     """Initialize the database schema."""
     conn = get_connection()
     cursor = conn.cursor()
 
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS grain_prices (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME NOT NULL,
-            commodity TEXT NOT NULL,
-            cash_price REAL,
-            basis REAL,
-            futures_change REAL,
-            delivery_start TEXT,
-            delivery_end TEXT
-        )
-    """)
+    _migrate_to_clustered(conn)
+
+    cursor.execute(_SCHEMA)
 
     cursor.execute("""
         CREATE INDEX IF NOT EXISTS idx_timestamp ON grain_prices(timestamp)
     """)
 
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_commodity ON grain_prices(commodity)
-    """)
+    # The primary key already clusters on (commodity, timestamp); the old
+    # secondary indexes just duplicated it
+    cursor.execute("DROP INDEX IF EXISTS idx_commodity_ts")
+    cursor.execute("DROP INDEX IF EXISTS idx_commodity")
 
     conn.commit()
-    conn.close()
 
 
 def insert_price(
@@ -53,7 +114,7 @@ def insert_price(
     delivery_start: Optional[str],
     delivery_end: Optional[str],
     timestamp: Optional[datetime] = None
-) -> int:
+) -> None:
     """Insert a grain price record."""
     if timestamp is None:
         timestamp = datetime.now()
@@ -62,48 +123,43 @@ def insert_price(
     cursor = conn.cursor()
 
     cursor.execute("""
-        INSERT INTO grain_prices
+        INSERT OR REPLACE INTO grain_prices
         (timestamp, commodity, cash_price, basis, futures_change, delivery_start, delivery_end)
         VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (timestamp.isoformat(), commodity, cash_price, basis, futures_change,
-          delivery_start, delivery_end))
+    """, (int(timestamp.timestamp()), commodity, cash_price, basis, futures_change,
+          delivery_start or '', delivery_end))
 
-    row_id = cursor.lastrowid
     conn.commit()
-    conn.close()
-
-    return row_id
 
 
 def insert_prices(prices: list[dict], timestamp: Optional[datetime] = None) -> int:
-    """Insert multiple grain price records."""
+    """Insert multiple grain price records in a single transaction."""
     if timestamp is None:
         timestamp = datetime.now()
 
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    count = 0
-    for price in prices:
-        cursor.execute("""
-            INSERT INTO grain_prices
-            (timestamp, commodity, cash_price, basis, futures_change, delivery_start, delivery_end)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            timestamp.isoformat(),
+    ts = int(timestamp.timestamp())
+    rows = [
+        (
+            ts,
             price.get('commodity'),
             price.get('cash_price'),
             price.get('basis'),
             price.get('futures_change'),
-            price.get('delivery_start'),
+            price.get('delivery_start') or '',
             price.get('delivery_end')
-        ))
-        count += 1
+        )
+        for price in prices
+    ]
 
-    conn.commit()
-    conn.close()
+    conn = get_connection()
+    with conn:
+        conn.executemany("""
+            INSERT OR REPLACE INTO grain_prices
+            (timestamp, commodity, cash_price, basis, futures_change, delivery_start, delivery_end)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
 
-    return count
+    return len(rows)
 
 
 def get_latest_prices() -> list[dict]:
@@ -111,14 +167,19 @@ def get_latest_prices() -> list[dict]:
     conn = get_connection()
     cursor = conn.cursor()
 
+    # Correlated max resolves per commodity via the (commodity, timestamp)
+    # primary key, so this stays O(#commodities) instead of scanning the
+    # whole table
     cursor.execute("""
-        SELECT * FROM grain_prices
-        WHERE timestamp = (SELECT MAX(timestamp) FROM grain_prices)
+        SELECT * FROM grain_prices g
+        WHERE timestamp = (
+            SELECT MAX(timestamp) FROM grain_prices g2
+            WHERE g2.commodity = g.commodity
+        )
         ORDER BY commodity
     """)
 
     rows = cursor.fetchall()
-    conn.close()
 
     return [dict(row) for row in rows]
 
@@ -141,21 +202,70 @@ def get_price_history(
 
     if start_date:
         query += " AND timestamp >= ?"
-        params.append(start_date.isoformat())
+        params.append(int(start_date.timestamp()))
 
     if end_date:
         query += " AND timestamp <= ?"
-        params.append(end_date.isoformat())
+        params.append(int(end_date.timestamp()))
 
     query += " ORDER BY timestamp DESC, commodity"
 
     cursor.execute(query, params)
     rows = cursor.fetchall()
-    conn.close()
 
     return [dict(row) for row in rows]
 
 
+def get_price_history_df(
+    commodity: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    commodities: Optional[list[str]] = None
+):
+    """Get price history as a pandas DataFrame.
+
+    Lets pandas read straight from the DB-API cursor instead of building
+    a Row object and a dict for every record.
+    """
+    import pandas as pd
+
+    query = "SELECT * FROM grain_prices WHERE 1=1"
+    params = []
+
+    if commodity:
+        query += " AND commodity = ?"
+        params.append(commodity)
+
+    if commodities is not None:
+        if commodities:
+            placeholders = ",".join("?" * len(commodities))
+            query += f" AND commodity IN ({placeholders})"
+            params.extend(commodities)
+        else:
+            # An empty selection matches nothing, unlike None (no filter)
+            query += " AND 0"
+
+    if start_date:
+        query += " AND timestamp >= ?"
+        params.append(int(start_date.timestamp()))
+
+    if end_date:
+        query += " AND timestamp <= ?"
+        params.append(int(end_date.timestamp()))
+
+    query += " ORDER BY timestamp DESC, commodity"
+
+    # Arrow-backed columns plus a categorical commodity keep dashboard
+    # filtering and grouping in native kernels instead of per-object work
+    df = pd.read_sql_query(
+        query, get_connection(), params=params,
+        parse_dates={'timestamp': {'unit': 's'}},
+        dtype_backend='pyarrow'
+    )
+    df['commodity'] = df['commodity'].astype('category')
+    return df
+
+
 def get_commodities() -> list[str]:
     """Get list of all commodities in database."""
     conn = get_connection()
@@ -163,24 +273,83 @@ def get_commodities() -> list[str]:
 
     cursor.execute("SELECT DISTINCT commodity FROM grain_prices ORDER BY commodity")
     rows = cursor.fetchall()
-    conn.close()
 
     return [row['commodity'] for row in rows]
 
 
+def get_summary(
+    commodities: Optional[list[str]] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> list[dict]:
+    """Get per-commodity cash price statistics, aggregated in SQLite."""
+    conn = get_connection()
+
+    query = """
+        SELECT commodity,
+               MIN(cash_price) AS min_price,
+               MAX(cash_price) AS max_price,
+               AVG(cash_price) AS avg_price,
+               COUNT(*) AS records
+        FROM grain_prices WHERE 1=1
+    """
+    params = []
+
+    if commodities is not None:
+        if commodities:
+            placeholders = ",".join("?" * len(commodities))
+            query += f" AND commodity IN ({placeholders})"
+            params.extend(commodities)
+        else:
+            # An empty selection matches nothing, unlike None (no filter)
+            query += " AND 0"
+
+    if start_date:
+        query += " AND timestamp >= ?"
+        params.append(int(start_date.timestamp()))
+
+    if end_date:
+        query += " AND timestamp <= ?"
+        params.append(int(end_date.timestamp()))
+
+    query += " GROUP BY commodity ORDER BY commodity"
+
+    rows = conn.execute(query, params).fetchall()
+
+    return [dict(row) for row in rows]
+
+
+def get_date_range() -> Optional[tuple[datetime, datetime]]:
+    """Get the (oldest, newest) record timestamps, or None if empty."""
+    conn = get_connection()
+    row = conn.execute(
+        "SELECT MIN(timestamp), MAX(timestamp) FROM grain_prices"
+    ).fetchone()
+
+    if row[0] is None:
+        return None
+
+    return datetime.fromtimestamp(row[0]), datetime.fromtimestamp(row[1])
+
+
+def get_record_count() -> int:
+    """Get the total number of price records."""
+    conn = get_connection()
+    return conn.execute("SELECT COUNT(*) FROM grain_prices").fetchone()[0]
+
+
 def load_sample_data() -> None:
     """Load sample data for demo purposes."""
     from datetime import timedelta
 
     conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM grain_prices")
-    count = cursor.fetchone()[0]
-    conn.close()
-
-    if count > 0:
+    if conn.execute("SELECT 1 FROM grain_prices LIMIT 1").fetchone():
         return  # Data already exists
 
+    # Deferred past the early return: this runs at module import, and a
+    # populated database should not pay for the numpy import
+    import numpy as np
+
     # Sample data based on real scrape from Legacy Cooperative - Rolla
     commodities = [
         ("Corn", 3.60, -0.70, "Feb-26"),
@@ -194,22 +363,31 @@ def load_sample_data() -> None:
         ("Canola", 19.56, 0.0, "Sep-26"),
     ]
 
-    # Create sample history over past 7 days
+    # Create sample history over past 7 days, inserted in one batch.
+    # One broadcast computes the whole day-by-commodity price grid:
+    # small alternating variation applied to every base price at once
+    days = np.arange(7, -1, -1)
+    variation = (7 - days) * 0.02 * np.where(days % 2 == 0, 1, -1)
+    base_prices = np.array([price for _, price, _, _ in commodities])
+    grid = np.round(base_prices[None, :] + variation[:, None], 2)
+
     base_time = datetime.now()
-    for days_ago in range(7, -1, -1):
-        timestamp = base_time - timedelta(days=days_ago)
-        variation = (7 - days_ago) * 0.02  # Small price variation
-
-        for commodity, price, basis, delivery in commodities:
-            insert_price(
-                commodity=commodity,
-                cash_price=round(price + variation * (1 if days_ago % 2 == 0 else -1), 2),
-                basis=basis,
-                futures_change=None,
-                delivery_start=delivery,
-                delivery_end=delivery,
-                timestamp=timestamp
-            )
+    rows = []
+    for i, days_ago in enumerate(days):
+        ts = int((base_time - timedelta(days=int(days_ago))).timestamp())
+
+        for j, (commodity, _, basis, delivery) in enumerate(commodities):
+            rows.append((
+                ts, commodity, float(grid[i, j]),
+                basis, None, delivery, delivery
+            ))
+
+    with conn:
+        conn.executemany("""
+            INSERT INTO grain_prices
+            (timestamp, commodity, cash_price, basis, futures_change, delivery_start, delivery_end)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
 
 
 # Initialize database on import
@@ -1,8 +1,12 @@
 """Scraper for Legacy Cooperative grain prices using Playwright."""
 
+import argparse
+import os
 import re
 import sys
 from datetime import datetime
+
+import httpx
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 
 import database
@@ -10,40 +14,118 @@ import database
 
 URL = "https://www.legacy-cooperative.com/grain#cash-bids"
 LOCATION = "Rolla"
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# JSON endpoint behind the DTN widget. Run the browser scrape once and
+# note the candidate bid URLs it logs, then export DTN_BIDS_ENDPOINT so
+# future runs skip Chromium entirely and just fetch the JSON.
+DTN_BIDS_ENDPOINT = os.environ.get('DTN_BIDS_ENDPOINT', '')
+
+# Resource types aborted in the browser; none carry cash bid data
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media'}
+
+# Table rows with price data
+TABLE_SELECTORS = [
+    'table.cash-bids tr',
+    '.dtn-cash-bids-table tr',
+    '[class*="cash"] table tr',
+    '.widget-content table tr',
+    'table tr'
+]
+
+# DTN widgets often use specific class patterns
+WIDGET_SELECTORS = [
+    '.dtn-cash-bids',
+    '[class*="cashbid"]',
+    '.commodity-row',
+    '.bid-row',
+    '[data-commodity]'
+]
+
+# Strips $ and other non-numeric chars except . and -
+_PRICE_RE = re.compile(r'[^\d.\-]')
 
 
 def parse_price(text: str) -> float | None:
     """Parse price string to float."""
     if not text or text.strip() in ['-', 'N/A', '']:
         return None
-    # Remove $ and other non-numeric chars except . and -
-    cleaned = re.sub(r'[^\d.\-]', '', text.strip())
+    cleaned = _PRICE_RE.sub('', text.strip())
     try:
         return float(cleaned)
     except ValueError:
         return None
 
 
-def scrape_grain_prices() -> list[dict]:
-    """Scrape grain prices from Legacy Cooperative website."""
-    prices = []
-
-    with sync_playwright() as p:
-        # Launch browser
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={'width': 1280, 'height': 800},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        )
+class GrainScraper:
+    """Scraper that keeps a persistent Chromium context warm between runs.
+
+    Launching Chromium cold costs a second or two per scrape; reusing a
+    persistent context keeps the browser cache and JS engine warm when
+    scraping repeatedly from the same process.
+    """
+
+    def __init__(self, profile_dir: str = ".playwright-profile"):
+        self.profile_dir = profile_dir
+        self._playwright = None
+        self._context = None
+
+    def _ensure_context(self):
+        """Start Playwright and the persistent context on first use."""
+        if self._context is None:
+            self._playwright = sync_playwright().start()
+            self._context = self._playwright.chromium.launch_persistent_context(
+                self.profile_dir,
+                headless=True,
+                viewport={'width': 1280, 'height': 800},
+                user_agent=USER_AGENT
+            )
+            # The widget data is all we need; skip heavy static assets
+            self._context.route('**/*', self._filter_route)
+        return self._context
+
+    @staticmethod
+    def _filter_route(route):
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            route.abort()
+        else:
+            route.continue_()
+
+    def close(self) -> None:
+        """Shut down the browser context and Playwright."""
+        if self._context is not None:
+            self._context.close()
+            self._context = None
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
+
+    def scrape(self) -> list[dict]:
+        """Scrape grain prices from Legacy Cooperative website."""
+        prices = []
+
+        context = self._ensure_context()
         page = context.new_page()
 
         try:
+            # Surface XHR URLs that look like bid feeds, so the JSON
+            # endpoint can be captured for DTN_BIDS_ENDPOINT
+            page.on('response', _log_bid_response)
+
             print(f"Navigating to {URL}...")
             page.goto(URL, wait_until='networkidle', timeout=30000)
 
-            # Wait for the cash bids widget to load
+            # Wait for the cash bids widget to load; proceeds as soon as
+            # any known price element appears instead of a fixed sleep
             print("Waiting for DTN widget to load...")
-            page.wait_for_timeout(3000)  # Initial wait for JavaScript
+            try:
+                page.wait_for_selector(
+                    ", ".join(TABLE_SELECTORS + WIDGET_SELECTORS),
+                    state='visible',
+                    timeout=15000
+                )
+            except PlaywrightTimeout:
+                print("Warning: No price elements appeared within 15s")
 
             # Try to find and click on Rolla location if there's a dropdown
             try:
@@ -62,16 +144,13 @@ def scrape_grain_prices() -> list[dict]:
                         if element.is_visible(timeout=1000):
                             element.click()
                             print(f"Selected location: {LOCATION}")
-                            page.wait_for_timeout(2000)
+                            page.wait_for_load_state('networkidle')
                             break
                     except:
                         continue
             except Exception as e:
                 print(f"Note: Could not find location selector: {e}")
 
-            # Wait for price data to appear
-            page.wait_for_timeout(2000)
-
             # Try multiple strategies to extract price data
             prices = extract_prices_from_table(page)
 
@@ -88,36 +167,103 @@ def scrape_grain_prices() -> list[dict]:
         except Exception as e:
             print(f"Error during scraping: {e}")
         finally:
-            browser.close()
+            page.close()
+
+        return prices
+
+
+def scrape_grain_prices() -> list[dict]:
+    """Scrape grain prices once with a throwaway scraper instance."""
+    scraper = GrainScraper()
+    try:
+        return scraper.scrape()
+    finally:
+        scraper.close()
+
+
+def _log_bid_response(response):
+    if 'bid' in response.url.lower():
+        print(f"Candidate bid endpoint: {response.url}")
+
+
+def fetch_prices_http() -> list[dict]:
+    """Fetch cash bids straight from the DTN JSON endpoint.
+
+    Returns an empty list when the endpoint is not configured or the
+    request fails, so callers can fall back to the browser scrape.
+    """
+    if not DTN_BIDS_ENDPOINT:
+        return []
+
+    try:
+        resp = httpx.get(
+            DTN_BIDS_ENDPOINT,
+            params={'location': LOCATION},
+            headers={'User-Agent': USER_AGENT},
+            timeout=10
+        )
+        resp.raise_for_status()
+        data = resp.json()
+    except Exception as e:
+        print(f"JSON endpoint failed ({e}); falling back to browser")
+        return []
+
+    bids = data.get('bids', data) if isinstance(data, dict) else data
+
+    prices = []
+    for bid in bids or []:
+        price_data = parse_bid_json(bid)
+        if price_data:
+            prices.append(price_data)
 
     return prices
 
 
+def parse_bid_json(bid) -> dict | None:
+    """Map one DTN bid object into the price dict shape."""
+    if not isinstance(bid, dict):
+        return None
+
+    def first(*keys):
+        for key in keys:
+            if bid.get(key) is not None:
+                return bid[key]
+        return None
+
+    commodity = first('commodity_display_name', 'commodity', 'name')
+    if not commodity:
+        return None
+
+    return {
+        'commodity': commodity,
+        'cash_price': parse_price(str(first('cashprice', 'cash_price', 'price'))),
+        'basis': parse_price(str(first('basis'))),
+        'futures_change': parse_price(str(first('change', 'futures_change'))),
+        'delivery_start': first('delivery_start', 'deliverystart'),
+        'delivery_end': first('delivery_end', 'deliveryend'),
+    }
+
+
 def extract_prices_from_table(page) -> list[dict]:
     """Extract prices from HTML table structure."""
     prices = []
 
-    # Look for table rows with price data
-    table_selectors = [
-        'table.cash-bids tr',
-        '.dtn-cash-bids-table tr',
-        '[class*="cash"] table tr',
-        '.widget-content table tr',
-        'table tr'
-    ]
-
-    for selector in table_selectors:
+    for selector in TABLE_SELECTORS:
         try:
-            rows = page.locator(selector).all()
-            if len(rows) > 1:  # Has header + data
-                print(f"Found {len(rows)} rows with selector: {selector}")
-
-                for row in rows[1:]:  # Skip header
-                    cells = row.locator('td').all()
-                    if len(cells) >= 3:
-                        price_data = extract_row_data(cells)
-                        if price_data and price_data.get('commodity'):
-                            prices.append(price_data)
+            # One round-trip: collect every cell's text inside the browser,
+            # skipping the header row
+            rows = page.eval_on_selector_all(selector, """
+                rows => rows.slice(1).map(
+                    r => Array.from(r.querySelectorAll('td'), c => c.innerText.trim())
+                )
+            """)
+            if rows:
+                print(f"Found {len(rows) + 1} rows with selector: {selector}")
+
+                for texts in rows:
+                    price_data = extract_row_data(texts)
+                    if price_data and price_data.get('commodity'):
+                        prices.append(price_data)
 
                 if prices:
                     break
@@ -131,16 +277,7 @@ def extract_prices_from_dtn_widget(page) -> list[dict]:
     """Extract prices from DTN widget elements."""
     prices = []
 
-    # DTN widgets often use specific class patterns
-    widget_selectors = [
-        '.dtn-cash-bids',
-        '[class*="cashbid"]',
-        '.commodity-row',
-        '.bid-row',
-        '[data-commodity]'
-    ]
-
-    for selector in widget_selectors:
+    for selector in WIDGET_SELECTORS:
         try:
             elements = page.locator(selector).all()
             if elements:
@@ -160,14 +297,12 @@ def extract_prices_from_dtn_widget(page) -> list[dict]:
     return prices
 
 
-def extract_row_data(cells) -> dict | None:
-    """Extract data from table row cells."""
+def extract_row_data(texts: list[str]) -> dict | None:
+    """Extract data from a row's cell texts."""
     try:
-        if len(cells) < 3:
+        if len(texts) < 3:
             return None
 
-        texts = [cell.inner_text().strip() for cell in cells]
-
         # Common column orders:
         # Commodity, Delivery, Cash Price, Basis, Change
         # or: Commodity, Cash Price, Basis, Change, Delivery
@@ -226,10 +361,19 @@ def parse_commodity_text(text: str) -> dict | None:
 
 def main():
     """Main entry point for scraper."""
+    parser = argparse.ArgumentParser(description="Scrape Legacy Cooperative grain prices")
+    parser.add_argument(
+        '--browser', action='store_true',
+        help='force the Playwright browser scrape, skipping the JSON endpoint'
+    )
+    args = parser.parse_args()
+
     print(f"Starting grain price scrape at {datetime.now()}")
     print("=" * 50)
 
-    prices = scrape_grain_prices()
+    prices = [] if args.browser else fetch_prices_http()
+    if not prices:
+        prices = scrape_grain_prices()
 
     if prices:
         print(f"\nFound {len(prices)} price records:")